@@ -1,34 +1,36 @@
 import json
+import os
 import re
+import time
+from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
 
 import pandas as pd
 import streamlit as st
 
-from instructor_gate import instructor_gate_ui, instructor_mode_enabled
-
-BASE_DIR = Path(__file__).resolve().parent
-CONTENT_DIR = BASE_DIR / "content"
-ITEMS_JSON_PATH = CONTENT_DIR / "items.json"
-
-PART_FILES = {
-    "Part 0": CONTENT_DIR / "parts" / "part_0.md",
-    "Part A": CONTENT_DIR / "parts" / "part_a.md",
-    "Part B": CONTENT_DIR / "parts" / "part_b.md",
-    "Part C": CONTENT_DIR / "parts" / "part_c.md",
-    "Part D": CONTENT_DIR / "parts" / "part_d.md",
-}
-
-APPENDIX_FILES = {
-    "Appendix 1": CONTENT_DIR / "appendices" / "appendix_1_one_health.md",
-    "Appendix 2": CONTENT_DIR / "appendices" / "appendix_2_anthrax_fact_sheet.md",
-    "Appendix 3": CONTENT_DIR / "appendices" / "appendix_3_line_list.md",
-}
-
-PART_ORDER = ["Part 0", "Part A", "Part B", "Part C", "Part D"]
-PART_LETTERS = ["A", "B", "C", "D"]
-PLACEHOLDER_PATTERN = re.compile(r"\[\[([^\[\]]+)\]\]")
+from case_content import (
+    APPENDIX_FILES,
+    BASE_DIR,
+    CHART_CACHE_DIR,
+    ITEMS_JSON_PATH,
+    LINE_LIST_PATH,
+    PART_FILES,
+    PART_LETTERS,
+    PART_ORDER,
+    PLACEHOLDER_PATTERN,
+    extract_placeholders,
+    normalize_placeholder_id,
+    slugify,
+)
+from charts import CHART_BUILDERS, CHART_PATTERN, load_chart_spec
+from cohort_generator import generate_variant, seed_for
+from instructor_gate import clear_credential_cache, instructor_gate_ui, instructor_mode_enabled, is_instructor_unlocked
+from pacing import PacingChannel
+from telemetry import HEARTBEAT_INTERVAL, BatchFlusher
+
+TELEMETRY_PATH = Path(os.environ.get("TELEMETRY_PATH", BASE_DIR / ".telemetry" / "events.jsonl"))
+PACING_ALL = "All parts"
 
 
 def inject_css() -> None:
@@ -113,23 +115,6 @@ def inject_css() -> None:
     )
 
 
-def normalize_placeholder_id(raw_id: str) -> str:
-    token = re.sub(r"\s+", "_", raw_id.strip())
-    if re.fullmatch(r"[Qq](\d+[A-Za-z]?)", token):
-        return f"Question_{re.sub(r'[Qq]', '', token, count=1)}"
-    question_match = re.fullmatch(r"[Qq]uestion[_ ]?(\d+[A-Za-z]?)", raw_id.strip())
-    if question_match:
-        return f"Question_{question_match.group(1)}"
-    if re.fullmatch(r"Question_\d+[A-Za-z]?", token):
-        return token
-    return token
-
-
-def slugify(text: str) -> str:
-    s = re.sub(r"[^a-zA-Z0-9\s-]", "", text).strip().lower()
-    return re.sub(r"[\s_-]+", "-", s)
-
-
 @st.cache_data
 def load_items_json(path: str) -> dict[str, Any]:
     with Path(path).open("r", encoding="utf-8") as f:
@@ -141,6 +126,40 @@ def load_markdown(path: str) -> str:
     return Path(path).read_text(encoding="utf-8")
 
 
+@st.cache_data
+def load_chart(name: str, line_list_path: str) -> dict[str, Any]:
+    return load_chart_spec(name, line_list_path, CHART_CACHE_DIR)
+
+
+@st.cache_data
+def load_variant_chart(name: str, group: str) -> dict[str, Any]:
+    return CHART_BUILDERS[name](generate_variant(seed_for(group))["line_list"])
+
+
+def active_variant() -> dict[str, Any] | None:
+    group = str(st.session_state.get("dataset_group", "")).strip()
+    return generate_variant(seed_for(group)) if group else None
+
+
+@st.cache_resource
+def telemetry_flusher() -> BatchFlusher:
+    return BatchFlusher(TELEMETRY_PATH)
+
+
+@st.cache_resource
+def pacing_channel() -> PacingChannel:
+    return PacingChannel()
+
+
+def track(event: str, section: str | None = None, qid: str | None = None, **detail: Any) -> None:
+    recorder = st.session_state.get("telemetry")
+    if recorder is None:
+        recorder = st.session_state["telemetry"] = telemetry_flusher().new_recorder()
+    elif not recorder.registered:
+        telemetry_flusher().register(recorder)
+    recorder.record(event, section, qid, **detail)
+
+
 def init_state() -> None:
     defaults = {
         "nav_mode": "Guided (Next/Back)",
@@ -150,15 +169,12 @@ def init_state() -> None:
         "include_appendices_guided": False,
         "show_all_questions": False,
         "active_qid": None,
+        "dataset_group": "",
     }
     for key, val in defaults.items():
         st.session_state.setdefault(key, val)
 
 
-def extract_placeholders(md_text: str) -> list[str]:
-    return [normalize_placeholder_id(m.group(1)) for m in PLACEHOLDER_PATTERN.finditer(md_text)]
-
-
 def question_number(qid: str) -> str:
     m = re.match(r"Question_(.+)", qid)
     return m.group(1) if m else qid
@@ -191,6 +207,25 @@ def response_preview(qid: str) -> str:
     return str(resp)
 
 
+def export_responses(items_payload: dict[str, Any], participant: str, dataset_group: str) -> dict[str, Any]:
+    responses = {}
+    for item in items_payload["items"]:
+        qid = item["id"]
+        responses[qid] = {
+            "response": st.session_state.get(f"resp_{qid}"),
+            "computed": st.session_state.get(f"computed_{qid}"),
+            "done": bool(st.session_state.get(f"done_{qid}", False)),
+        }
+    return {
+        "participant": participant,
+        "dataset_group": dataset_group.strip() or None,
+        "module_id": items_payload.get("module_id"),
+        "version": items_payload.get("version"),
+        "exported_utc": datetime.now(timezone.utc).isoformat(),
+        "responses": responses,
+    }
+
+
 def validate_items(payload: dict[str, Any]) -> list[str]:
     errors = []
     for key in ["module_id", "title", "items"]:
@@ -330,6 +365,7 @@ def render_input_widget(item: dict[str, Any]) -> None:
         st.session_state[df_key] = edited
         st.session_state[resp_key] = edited.to_dict(orient="records")
         if st.button("Compute", key=f"compute_{qid}"):
+            track("compute", qid=qid)
             numeric = edited.select_dtypes(include="number")
             st.session_state[comp_key] = {
                 "rows": int(len(edited)),
@@ -345,7 +381,43 @@ def render_input_widget(item: dict[str, Any]) -> None:
             height=130,
         )
 
-    st.session_state[done_key] = st.checkbox("Mark as complete", key=f"donebox_{qid}", value=bool(st.session_state.get(done_key, False)))
+    was_done = bool(st.session_state.get(done_key, False))
+    st.session_state[done_key] = st.checkbox("Mark as complete", key=f"donebox_{qid}", value=was_done)
+    if st.session_state[done_key] and not was_done:
+        track("complete", qid=qid)
+
+
+def instructor_content(item: dict[str, Any]) -> dict[str, Any]:
+    instr = item.get("instructor_mode", {})
+    variant = active_variant()
+    if variant and item["id"] in variant["model_answers"]:
+        return {**instr, "model_answer": variant["model_answers"][item["id"]]}
+    return instr
+
+
+def render_variant_line_list(variant: dict[str, Any]) -> None:
+    group = st.session_state["dataset_group"].strip()
+    st.info(
+        f"Line list for dataset group '{group}' ({len(variant['line_list'])} cases). "
+        "Use it for Question 14; the tables and figures in Part B describe the original outbreak."
+    )
+    frame = pd.DataFrame(variant["line_list"]).rename(
+        columns={
+            "case_no": "Case no.",
+            "district": "District",
+            "subcounty": "Subcounty",
+            "village": "Village",
+            "sex": "Sex",
+            "age": "Age",
+            "category": "Anthrax category",
+            "onset": "Date of sickness onset",
+            "lab_investigated": "Laboratory investigation?",
+            "lab_result": "Lab result",
+            "respondent": "Cohort respondent?",
+        }
+    )
+    st.dataframe(frame, hide_index=True, use_container_width=True)
+    st.vega_lite_chart(load_variant_chart("age_sex_pyramid", group), use_container_width=True)
 
 
 def render_question(item: dict[str, Any], instructor_on: bool, active: bool = False) -> None:
@@ -364,12 +436,28 @@ def render_question(item: dict[str, Any], instructor_on: bool, active: bool = Fa
                 st.markdown(item.get("prompt", ""))
                 render_input_widget(item)
             with right:
-                render_facilitator_panel(item.get("instructor_mode", {}))
+                render_facilitator_panel(instructor_content(item))
         else:
             st.markdown(item.get("prompt", ""))
             render_input_widget(item)
 
 
+def render_narrative(md_text: str) -> None:
+    last = 0
+    for match in CHART_PATTERN.finditer(md_text):
+        before = md_text[last:match.start()]
+        if before.strip():
+            st.markdown(before)
+        try:
+            st.vega_lite_chart(load_chart(match.group(1), str(LINE_LIST_PATH)), use_container_width=True)
+        except (KeyError, FileNotFoundError) as exc:
+            st.warning(f"Chart '{match.group(1)}' could not be rendered: {exc}")
+        last = match.end()
+    tail = md_text[last:]
+    if tail.strip():
+        st.markdown(tail)
+
+
 def render_embedded_markdown(
     md_text: str,
     items_by_id: dict[str, dict[str, Any]],
@@ -381,7 +469,7 @@ def render_embedded_markdown(
     for match in PLACEHOLDER_PATTERN.finditer(md_text):
         narrative = md_text[last:match.start()]
         if narrative.strip():
-            st.markdown(narrative)
+            render_narrative(narrative)
 
         raw_id = match.group(1)
         qid = normalize_placeholder_id(raw_id)
@@ -398,7 +486,7 @@ def render_embedded_markdown(
 
     tail = md_text[last:]
     if tail.strip():
-        st.markdown(tail)
+        render_narrative(tail)
 
 
 def render_front_matter_toc(items_payload: dict[str, Any]) -> None:
@@ -425,8 +513,42 @@ def section_complete(section: str, part_items: dict[str, list[dict[str, Any]]])
     return bool(items) and all(is_answered(it["id"]) for it in items)
 
 
+def section_reachable(section: str, max_section: str | None) -> bool:
+    if max_section is None or section not in PART_ORDER or max_section not in PART_ORDER:
+        return True
+    return PART_ORDER.index(section) <= PART_ORDER.index(max_section)
+
+
+def last_reachable_step(guided_steps: list[dict[str, str | None]], max_section: str | None) -> int:
+    last = 0
+    for idx, step in enumerate(guided_steps):
+        if not section_reachable(str(step["section"]), max_section):
+            break
+        last = idx
+    return last
+
+
+def publish_pacing() -> None:
+    selection = st.session_state.get("pacing_selection", PACING_ALL)
+    pacing_channel().publish(None if selection == PACING_ALL else selection)
+
+
+def render_pacing_control() -> None:
+    state = pacing_channel().state
+    options = [PACING_ALL, *PART_ORDER]
+    current = state.max_section or PACING_ALL
+    st.markdown("**Class pacing**")
+    st.selectbox("Participants can open up to", options, index=options.index(current), key="pacing_selection")
+    st.button("Publish to all participants", use_container_width=True, on_click=publish_pacing)
+    if state.version:
+        st.caption(f"Live: {current} (update #{state.version})")
+    else:
+        st.caption("Live: all parts open")
+
+
 def jump_to_question(qid: str, nav_mode: str, guided_steps: list[dict[str, str | None]], items_by_id: dict[str, dict[str, Any]]) -> None:
     st.session_state["active_qid"] = qid
+    track("jump", qid=qid, nav_mode=nav_mode)
     if nav_mode == "Guided (Next/Back)":
         for idx, step in enumerate(guided_steps):
             if step.get("question_id") == qid:
@@ -437,11 +559,28 @@ def jump_to_question(qid: str, nav_mode: str, guided_steps: list[dict[str, str |
         st.session_state["jump_section"] = f"Part {part}" if part in PART_LETTERS else "Part 0"
 
 
+def track_step(section: str, qid: str | None) -> None:
+    now = time.time()
+    if st.session_state.get("tracked_step") != (section, qid):
+        st.session_state["tracked_step"] = (section, qid)
+        st.session_state["tracked_at"] = now
+        track("step", section, qid, guided_idx=st.session_state["guided_idx"], nav_mode=st.session_state["nav_mode"])
+    elif now - st.session_state.get("tracked_at", 0.0) >= HEARTBEAT_INTERVAL:
+        st.session_state["tracked_at"] = now
+        track("heartbeat", section, qid)
+
+
 def main() -> None:
     st.set_page_config(page_title="Anthrax Case Study", layout="wide")
     inject_css()
     init_state()
 
+    # Resolve instructor access once per render pass.
+    with st.sidebar:
+        instructor_gate_ui(help_text="Unlock instructor mode to view facilitator guidance.")
+    instructor_unlocked = is_instructor_unlocked()
+    instructor_on = instructor_mode_enabled()
+
     try:
         items_payload = load_items_json(str(ITEMS_JSON_PATH))
     except FileNotFoundError:
@@ -480,8 +619,9 @@ def main() -> None:
         except FileNotFoundError:
             appendix_markdown[appendix] = None
 
+    max_section = None if instructor_unlocked else pacing_channel().state.max_section
     guided_steps = build_guided_steps(part_placeholders, st.session_state["include_appendices_guided"])
-    st.session_state["guided_idx"] = min(st.session_state["guided_idx"], max(0, len(guided_steps) - 1))
+    st.session_state["guided_idx"] = min(st.session_state["guided_idx"], last_reachable_step(guided_steps, max_section))
 
     total = sum(len(part_items[l]) for l in PART_LETTERS)
     answered = sum(1 for l in PART_LETTERS for item in part_items[l] if is_answered(item["id"]))
@@ -489,13 +629,14 @@ def main() -> None:
 
     st.markdown("<div class='main-shell'>", unsafe_allow_html=True)
     st.title(items_payload.get("title", "Anthrax Case Study"))
-    if instructor_mode_enabled():
+    if instructor_on:
         st.markdown("<div class='view-banner'>🔓 Instructor View</div>", unsafe_allow_html=True)
     else:
         st.markdown("<div class='view-banner participant-banner'>🔒 Participant View</div>", unsafe_allow_html=True)
 
     with st.sidebar:
-        instructor_gate_ui(help_text="Unlock instructor mode to view facilitator guidance.")
+        if instructor_unlocked:
+            render_pacing_control()
         st.session_state["nav_mode"] = st.radio(
             "Navigation",
             ["Guided (Next/Back)", "Jump to Section"],
@@ -510,6 +651,11 @@ def main() -> None:
                 "Show all questions in this part",
                 value=bool(st.session_state["show_all_questions"]),
             )
+        st.text_input(
+            "Dataset group code",
+            key="dataset_group",
+            help="Your facilitator may give your group a code for its own line list. Leave blank for the original data.",
+        )
 
         st.markdown("### Sections")
         active_section = (
@@ -522,6 +668,8 @@ def main() -> None:
             icon = "✅" if section_complete(section, part_items) else "⏳"
             if section == "Part 0":
                 icon = "📖"
+            if not section_reachable(section, max_section):
+                icon = "🔒"
             if section == active_section:
                 classes.append("section-active")
             if section_complete(section, part_items):
@@ -530,6 +678,7 @@ def main() -> None:
 
         if st.button("Reload content (clear cache)", use_container_width=True):
             st.cache_data.clear()
+            clear_credential_cache()
             st.rerun()
 
     learn_tab, review_tab, appendices_tab = st.tabs(["Learn & Respond", "Review Answers", "Appendices"])
@@ -538,7 +687,11 @@ def main() -> None:
         st.progress(pct, text=f"Progress (Parts A–D): {answered}/{total}")
 
         if st.session_state["nav_mode"] == "Jump to Section":
-            section = st.selectbox("Jump to section", PART_ORDER, key="jump_section")
+            open_sections = [p for p in PART_ORDER if section_reachable(p, max_section)]
+            if st.session_state["jump_section"] not in open_sections:
+                st.session_state["jump_section"] = open_sections[-1]
+            section = st.selectbox("Jump to section", open_sections, key="jump_section")
+            track_step(section, None)
             md = part_markdown.get(section)
             if section == "Part 0":
                 render_front_matter_toc(items_payload)
@@ -547,18 +700,19 @@ def main() -> None:
                 st.error(f"Missing markdown for {section}: {PART_FILES[section].relative_to(BASE_DIR)}")
                 letter = section.split(" ")[-1]
                 for item in part_items.get(letter, []):
-                    render_question(item, instructor_mode_enabled(), active=(item["id"] == st.session_state.get("active_qid")))
+                    render_question(item, instructor_on, active=(item["id"] == st.session_state.get("active_qid")))
             else:
-                render_embedded_markdown(md, items_by_id, instructor_mode_enabled(), None, st.session_state.get("active_qid"))
+                render_embedded_markdown(md, items_by_id, instructor_on, None, st.session_state.get("active_qid"))
 
         else:
             guided_steps = build_guided_steps(part_placeholders, st.session_state["include_appendices_guided"])
-            max_idx = max(0, len(guided_steps) - 1)
+            max_idx = last_reachable_step(guided_steps, max_section)
             st.session_state["guided_idx"] = min(st.session_state["guided_idx"], max_idx)
             step = guided_steps[st.session_state["guided_idx"]]
             section = str(step["section"])
             current_qid = step.get("question_id")
             st.session_state["active_qid"] = current_qid
+            track_step(section, current_qid)
 
             if section == "Part 0":
                 render_front_matter_toc(items_payload)
@@ -572,12 +726,12 @@ def main() -> None:
                     letter = section.split(" ")[-1]
                     for item in part_items.get(letter, []):
                         if st.session_state["show_all_questions"] or item["id"] == current_qid:
-                            render_question(item, instructor_mode_enabled(), active=(item["id"] == current_qid))
+                            render_question(item, instructor_on, active=(item["id"] == current_qid))
             else:
                 visible_qids = None
                 if section.startswith("Part ") and section != "Part 0" and current_qid and not st.session_state["show_all_questions"]:
                     visible_qids = {current_qid}
-                render_embedded_markdown(md, items_by_id, instructor_mode_enabled(), visible_qids, current_qid)
+                render_embedded_markdown(md, items_by_id, instructor_on, visible_qids, current_qid)
 
             c1, c2, c3 = st.columns([1, 1, 1])
             with c1:
@@ -593,9 +747,18 @@ def main() -> None:
                 if st.button("Next ➡️", disabled=st.session_state["guided_idx"] >= max_idx, use_container_width=True):
                     st.session_state["guided_idx"] = min(max_idx, st.session_state["guided_idx"] + 1)
                     st.rerun()
+            if st.session_state["guided_idx"] >= max_idx and max_idx < len(guided_steps) - 1:
+                st.caption(f"🔒 {guided_steps[max_idx + 1]['section']} opens when your facilitator releases it.")
 
     with review_tab:
         st.subheader("Review Answers")
+        participant = st.text_input("Your name (for your workbook)", key="participant_name")
+        st.download_button(
+            "Download my answers",
+            data=json.dumps(export_responses(items_payload, participant, st.session_state["dataset_group"]), ensure_ascii=False, indent=2, default=str),
+            file_name=f"{slugify(participant) or 'participant'}-answers.json",
+            mime="application/json",
+        )
         for item in all_items:
             qid = item["id"]
             with st.container(border=True):
@@ -603,12 +766,13 @@ def main() -> None:
                 c1.markdown(f"**{qid}**")
                 c1.caption("✅ answered" if is_answered(qid) else "⏳ pending")
                 c2.caption(response_preview(qid) or "No response yet")
-                if c3.button("Go", key=f"go_{qid}"):
+                part_section = f"Part {str(item.get('part', '')).upper()}"
+                if c3.button("Go", key=f"go_{qid}", disabled=not section_reachable(part_section, max_section)):
                     jump_to_question(qid, st.session_state["nav_mode"], guided_steps, items_by_id)
                     st.rerun()
-                if instructor_mode_enabled():
+                if instructor_on:
                     if c4.button("Show model answer", key=f"model_{qid}"):
-                        model = item.get("instructor_mode", {}).get("model_answer")
+                        model = instructor_content(item).get("model_answer")
                         if model:
                             st.info("Suggested response")
                             st.success(model if isinstance(model, str) else json.dumps(model, ensure_ascii=False, indent=2))
@@ -618,10 +782,13 @@ def main() -> None:
     with appendices_tab:
         appendix = st.selectbox("Select appendix", list(APPENDIX_FILES.keys()), key="appendix_selection")
         text = appendix_markdown.get(appendix)
-        if text is None:
+        variant = active_variant()
+        if appendix == "Appendix 3" and variant is not None:
+            render_variant_line_list(variant)
+        elif text is None:
             st.error(f"Missing markdown for {appendix}: {APPENDIX_FILES[appendix].relative_to(BASE_DIR)}")
         else:
-            render_embedded_markdown(text, items_by_id, instructor_mode_enabled(), None, st.session_state.get("active_qid"))
+            render_embedded_markdown(text, items_by_id, instructor_on, None, st.session_state.get("active_qid"))
 
     st.markdown("</div>", unsafe_allow_html=True)
 
@@ -0,0 +1,52 @@
+"""Content file locations and placeholder parsing shared by the app and offline tools."""
+
+from __future__ import annotations
+
+import re
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+CONTENT_DIR = BASE_DIR / "content"
+ITEMS_JSON_PATH = CONTENT_DIR / "items.json"
+CHART_CACHE_DIR = BASE_DIR / ".cache" / "charts"
+
+PART_FILES = {
+    "Part 0": CONTENT_DIR / "parts" / "part_0.md",
+    "Part A": CONTENT_DIR / "parts" / "part_a.md",
+    "Part B": CONTENT_DIR / "parts" / "part_b.md",
+    "Part C": CONTENT_DIR / "parts" / "part_c.md",
+    "Part D": CONTENT_DIR / "parts" / "part_d.md",
+}
+
+APPENDIX_FILES = {
+    "Appendix 1": CONTENT_DIR / "appendices" / "appendix_1_one_health.md",
+    "Appendix 2": CONTENT_DIR / "appendices" / "appendix_2_anthrax_fact_sheet.md",
+    "Appendix 3": CONTENT_DIR / "appendices" / "appendix_3_line_list.md",
+}
+
+LINE_LIST_PATH = APPENDIX_FILES["Appendix 3"]
+
+PART_ORDER = ["Part 0", "Part A", "Part B", "Part C", "Part D"]
+PART_LETTERS = ["A", "B", "C", "D"]
+PLACEHOLDER_PATTERN = re.compile(r"\[\[([^\[\]]+)\]\]")
+
+
+def normalize_placeholder_id(raw_id: str) -> str:
+    token = re.sub(r"\s+", "_", raw_id.strip())
+    if re.fullmatch(r"[Qq](\d+[A-Za-z]?)", token):
+        return f"Question_{re.sub(r'[Qq]', '', token, count=1)}"
+    question_match = re.fullmatch(r"[Qq]uestion[_ ]?(\d+[A-Za-z]?)", raw_id.strip())
+    if question_match:
+        return f"Question_{question_match.group(1)}"
+    if re.fullmatch(r"Question_\d+[A-Za-z]?", token):
+        return token
+    return token
+
+
+def slugify(text: str) -> str:
+    s = re.sub(r"[^a-zA-Z0-9\s-]", "", text).strip().lower()
+    return re.sub(r"[\s_-]+", "-", s)
+
+
+def extract_placeholders(md_text: str) -> list[str]:
+    return [normalize_placeholder_id(m.group(1)) for m in PLACEHOLDER_PATTERN.finditer(md_text)]
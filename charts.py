@@ -0,0 +1,138 @@
+"""Pre-rendered Vega-Lite chart specs for the case study figures.
+
+Specs are built once per dataset version (a hash of the source markdown) and
+stored as JSON on disk, so reruns only read a small file instead of
+re-aggregating the line list and laying out the plot.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from collections import Counter
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Any, Callable
+
+from outbreak_data import ANTHRAX_CATEGORIES, CATTLE_DEATHS, dataset_version, parse_line_list
+
+# Bump when a builder changes so stale cached specs are not reused.
+CHART_SCHEMA_VERSION = 1
+CHART_PATTERN = re.compile(r"\{\{chart:([a-z0-9_]+)\}\}")
+
+VEGA_LITE_SCHEMA = "https://vega.github.io/schema/vega-lite/v5.json"
+EPI_CURVE_START = date(2018, 4, 8)
+EPI_CURVE_END = date(2018, 4, 29)
+CATTLE_LABEL = "Sudden cattle deaths"
+CATEGORY_COLORS = ["#0065A4", "#f59e0b", "#7c3aed"]
+CATTLE_COLOR = "#7f1d1d"
+SEX_LABELS = {"M": "Male", "F": "Female"}
+AGE_BAND_WIDTH = 10
+AGE_BAND_OPEN_FROM = 80
+
+
+def build_epi_curve_spec(cases: list[dict[str, Any]]) -> dict[str, Any]:
+    days = [EPI_CURVE_START + timedelta(days=i) for i in range((EPI_CURVE_END - EPI_CURVE_START).days + 1)]
+    day_labels = [f"{d.day:02d}" for d in days]
+    counts = Counter((c["onset"], c["category"]) for c in cases)
+
+    human_rows = [
+        {"day": f"{d.day:02d}", "presentation": label, "cases": counts[(d, code)]}
+        for d in days
+        for code, label in ANTHRAX_CATEGORIES.items()
+        if counts[(d, code)]
+    ]
+    cattle_rows = [{"day": f"{d.day:02d}", "presentation": CATTLE_LABEL, "deaths": n} for d, n in sorted(CATTLE_DEATHS.items())]
+
+    x = {"field": "day", "type": "ordinal", "title": "Date of onset / occurrence (April 2018)", "scale": {"domain": day_labels}, "axis": {"labelAngle": 0}}
+    color_scale = {"domain": [*ANTHRAX_CATEGORIES.values(), CATTLE_LABEL], "range": [*CATEGORY_COLORS, CATTLE_COLOR]}
+    return {
+        "$schema": VEGA_LITE_SCHEMA,
+        "title": f"Human anthrax cases (n={len(cases)}) and sudden cattle deaths (n={sum(CATTLE_DEATHS.values())}), Kaplobotwo",
+        "layer": [
+            {
+                "data": {"values": human_rows},
+                "mark": {"type": "bar", "width": {"band": 0.9}},
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "cases", "type": "quantitative", "aggregate": "sum", "title": "Number of cases / deaths", "axis": {"tickMinStep": 1}},
+                    "color": {"field": "presentation", "type": "nominal", "title": None, "scale": color_scale},
+                    "order": {"field": "presentation"},
+                    "tooltip": [{"field": "day"}, {"field": "presentation"}, {"field": "cases"}],
+                },
+            },
+            {
+                "data": {"values": cattle_rows},
+                "mark": {"type": "point", "shape": "triangle-down", "filled": True, "size": 140, "opacity": 1},
+                "encoding": {
+                    "x": x,
+                    "y": {"field": "deaths", "type": "quantitative"},
+                    "color": {"field": "presentation", "type": "nominal", "scale": color_scale},
+                    "tooltip": [{"field": "day"}, {"field": "presentation"}, {"field": "deaths"}],
+                },
+            },
+        ],
+        "config": {"legend": {"orient": "bottom"}},
+    }
+
+
+def age_band(age: int) -> str:
+    if age >= AGE_BAND_OPEN_FROM:
+        return f"{AGE_BAND_OPEN_FROM}+"
+    lo = age - age % AGE_BAND_WIDTH
+    return f"{lo}–{lo + AGE_BAND_WIDTH - 1}"
+
+
+def build_age_sex_pyramid_spec(cases: list[dict[str, Any]]) -> dict[str, Any]:
+    bands = [age_band(a) for a in range(0, AGE_BAND_OPEN_FROM + 1, AGE_BAND_WIDTH)]
+    counts = Counter((age_band(c["age"]), c["sex"]) for c in cases)
+    rows = [
+        {
+            "age_band": band,
+            "sex": label,
+            "cases": counts[(band, code)],
+            "signed_cases": -counts[(band, code)] if code == "M" else counts[(band, code)],
+        }
+        for band in bands
+        for code, label in SEX_LABELS.items()
+    ]
+    return {
+        "$schema": VEGA_LITE_SCHEMA,
+        "title": f"Human anthrax cases by age and sex (n={len(cases)}), Kaplobotwo",
+        "data": {"values": rows},
+        "mark": "bar",
+        "encoding": {
+            "y": {"field": "age_band", "type": "ordinal", "title": "Age (years)", "sort": list(reversed(bands))},
+            "x": {"field": "signed_cases", "type": "quantitative", "title": "Number of cases", "axis": {"labelExpr": "abs(datum.value)", "tickMinStep": 1}},
+            "color": {"field": "sex", "type": "nominal", "title": None, "scale": {"domain": list(SEX_LABELS.values()), "range": ["#0065A4", "#db2777"]}},
+            "tooltip": [{"field": "age_band", "title": "Age"}, {"field": "sex"}, {"field": "cases"}],
+        },
+        "config": {"legend": {"orient": "bottom"}},
+    }
+
+
+CHART_BUILDERS: dict[str, Callable[[list[dict[str, Any]]], dict[str, Any]]] = {
+    "epi_curve": build_epi_curve_spec,
+    "age_sex_pyramid": build_age_sex_pyramid_spec,
+}
+
+
+def load_chart_spec(name: str, line_list_path: str | Path, cache_dir: str | Path) -> dict[str, Any]:
+    """Return the spec for ``name``, building and caching it on first use."""
+    if name not in CHART_BUILDERS:
+        raise KeyError(f"Unknown chart: {name}")
+    source = Path(line_list_path).read_text(encoding="utf-8")
+    version = dataset_version(f"{CHART_SCHEMA_VERSION}\n{source}")
+    cache_path = Path(cache_dir) / f"{name}-{version}.json"
+    try:
+        return json.loads(cache_path.read_text(encoding="utf-8"))
+    except (FileNotFoundError, json.JSONDecodeError):
+        pass
+
+    spec = CHART_BUILDERS[name](parse_line_list(source))
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = cache_path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(spec, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, cache_path)
+    return spec
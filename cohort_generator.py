@@ -0,0 +1,229 @@
+"""Seeded synthetic variants of the Kaplobotwo outbreak for participants or groups.
+
+Each variant keeps the village structure from Part B fixed (234 residents
+with the Table 4a/4b sex and age-group denominators, 57 households, 141
+cohort respondents, at least one per household) and redraws who became a
+case, their presentation, onset date and laboratory follow-up around the
+rates observed in the Appendix 3 line list. Each line-list case is flagged
+as a cohort respondent or not, and the model answers include the cohort
+counts. All sampling is vectorised with numpy, and variants
+are cached by seed.
+
+    python cohort_generator.py group-1 group-2 group-3
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sys
+import time
+from functools import lru_cache
+from typing import Any, Iterable
+
+import numpy as np
+
+from case_content import LINE_LIST_PATH
+from outbreak_data import ANTHRAX_CATEGORIES, load_line_list
+
+VILLAGE = {"district": "Kween", "subcounty": "Ngenge", "village": "Kaplobotwo"}
+HOUSEHOLDS = 57
+RESPONDENTS = 141
+SEX_POPULATION = {"M": 127, "F": 107}
+# (label, lowest age, highest age, residents) as in Table 4b.
+AGE_GROUPS = [
+    ("0-4", 0, 4, 41),
+    ("5-10", 5, 10, 41),
+    ("11-17", 11, 17, 56),
+    ("18-34", 18, 34, 45),
+    ("35-54", 35, 54, 39),
+    ("≥55", 55, 85, 12),
+]
+# Relative chance of answering the questionnaire; boarding-school children
+# and travelling adults were the main non-respondents.
+RESPONSE_WEIGHTS = np.array([1.0, 1.0, 0.6, 0.7, 1.0, 1.0])
+# Lower values spread variants further from the observed outbreak.
+DIRICHLET_CONCENTRATION = 40.0
+RATE_DISPERSION = 0.25
+VARIANT_CACHE_SIZE = 256
+
+AGE_EDGES = np.array([lo for _, lo, _, _ in AGE_GROUPS[1:]])
+CATEGORY_CODES = list(ANTHRAX_CATEGORIES)
+
+
+def seed_for(label: str) -> int:
+    """Stable seed for a participant or group label."""
+    return int.from_bytes(hashlib.sha256(label.strip().lower().encode("utf-8")).digest()[:8], "big")
+
+
+@lru_cache(maxsize=1)
+def observed_parameters() -> dict[str, Any]:
+    cases = load_line_list(LINE_LIST_PATH)
+    ages = np.array([c["age"] for c in cases])
+    groups = np.searchsorted(AGE_EDGES, ages, side="right")
+    group_pop = np.array([n for *_, n in AGE_GROUPS])
+    onsets = sorted({c["onset"] for c in cases})
+    investigated = np.array([c["lab_investigated"] for c in cases])
+    positive = np.array([c["lab_result"] == "Positive" for c in cases])
+    return {
+        "n_cases": len(cases),
+        "age_attack_rate": np.bincount(groups, minlength=len(AGE_GROUPS)) / group_pop,
+        "sex_attack_rate": {
+            sex: sum(c["sex"] == sex for c in cases) / pop for sex, pop in SEX_POPULATION.items()
+        },
+        "category_p": np.array([sum(c["category"] == code for c in cases) for code in CATEGORY_CODES]) / len(cases),
+        "onset_days": onsets,
+        "onset_p": np.array([sum(c["onset"] == d for c in cases) for d in onsets]) / len(cases),
+        "lab_investigated_p": investigated.mean(),
+        "lab_positive_p": positive[investigated].mean() if investigated.any() else 0.0,
+    }
+
+
+def _residents(rng: np.random.Generator) -> dict[str, np.ndarray]:
+    group = np.repeat(np.arange(len(AGE_GROUPS)), [n for *_, n in AGE_GROUPS])
+    lo = np.array([g[1] for g in AGE_GROUPS])[group]
+    hi = np.array([g[2] for g in AGE_GROUPS])[group]
+    sex = rng.permutation(np.repeat(np.array(list(SEX_POPULATION)), list(SEX_POPULATION.values())))
+    household = rng.permutation(np.concatenate([np.arange(HOUSEHOLDS), rng.integers(0, HOUSEHOLDS, group.size - HOUSEHOLDS)]))
+    return {"age_group": group, "age": rng.integers(lo, hi + 1), "sex": sex, "household": household}
+
+
+def _respondents(rng: np.random.Generator, residents: dict[str, np.ndarray]) -> np.ndarray:
+    # One respondent per household first (every household was visited), then
+    # fill the rest weighted by age group.
+    order = rng.permutation(residents["household"].size)
+    _, first = np.unique(residents["household"][order], return_index=True)
+    chosen = np.zeros(order.size, dtype=bool)
+    chosen[order[first]] = True
+    weights = np.where(chosen, 0.0, RESPONSE_WEIGHTS[residents["age_group"]])
+    extra = rng.choice(order.size, RESPONDENTS - int(chosen.sum()), replace=False, p=weights / weights.sum())
+    chosen[extra] = True
+    return chosen
+
+
+def generate_variant(seed: int) -> dict[str, Any]:
+    """Synthetic outbreak for ``seed``; cached, so treat the result as read-only."""
+    return _generate_variant(int(seed))
+
+
+@lru_cache(maxsize=VARIANT_CACHE_SIZE)
+def _generate_variant(seed: int) -> dict[str, Any]:
+    obs = observed_parameters()
+    rng = np.random.default_rng(seed)
+    residents = _residents(rng)
+
+    # Per-person risk is the observed age-group rate times the observed sex
+    # rate, each perturbed with log-normal noise, rescaled to a case load
+    # drawn around the observed total.
+    age_rate = obs["age_attack_rate"] * rng.lognormal(0.0, RATE_DISPERSION, len(AGE_GROUPS))
+    sex_rate = np.array([obs["sex_attack_rate"][s] for s in SEX_POPULATION]) * rng.lognormal(0.0, RATE_DISPERSION, 2)
+    sex_index = (residents["sex"] == "F").astype(int)
+    risk = age_rate[residents["age_group"]] * sex_rate[sex_index]
+    expected = obs["n_cases"] * rng.lognormal(0.0, RATE_DISPERSION / 2)
+    risk = np.clip(risk * expected / risk.sum(), 0.0, 0.95)
+    is_case = rng.random(risk.size) < risk
+
+    idx = np.flatnonzero(is_case)
+    n = idx.size
+    category = rng.choice(len(CATEGORY_CODES), n, p=rng.dirichlet(obs["category_p"] * DIRICHLET_CONCENTRATION + 0.5))
+    onset_p = rng.dirichlet(obs["onset_p"] * DIRICHLET_CONCENTRATION + 0.1)
+    onset_offset = rng.choice(len(obs["onset_days"]), n, p=onset_p)
+    investigated = rng.random(n) < obs["lab_investigated_p"]
+    positive = investigated & (rng.random(n) < obs["lab_positive_p"])
+    respondent = _respondents(rng, residents)
+
+    cases = [
+        {
+            "case_no": int(i) + 1,
+            **VILLAGE,
+            "sex": str(residents["sex"][i]),
+            "age": int(residents["age"][i]),
+            "category": CATEGORY_CODES[category[k]],
+            "onset": obs["onset_days"][onset_offset[k]],
+            "lab_investigated": bool(investigated[k]),
+            "lab_result": "Positive" if positive[k] else None,
+            "respondent": bool(respondent[i]),
+        }
+        for k, i in enumerate(idx)
+    ]
+    cases.sort(key=lambda c: (c["age"], c["case_no"]))
+
+    for arr in (*residents.values(), is_case, respondent):
+        arr.setflags(write=False)
+
+    return {
+        "seed": seed,
+        "line_list": cases,
+        "residents": {**residents, "is_case": is_case, "respondent": respondent},
+        "model_answers": derive_model_answers(residents, is_case, respondent),
+    }
+
+
+def attack_rate_rows(residents: dict[str, np.ndarray], is_case: np.ndarray) -> dict[str, list[dict[str, Any]]]:
+    by_sex = []
+    for label, sex in (("Males", "M"), ("Females", "F")):
+        mask = residents["sex"] == sex
+        by_sex.append(_rate_row(label, int(is_case[mask].sum()), int(mask.sum())))
+    cases_by_age = np.bincount(residents["age_group"][is_case], minlength=len(AGE_GROUPS))
+    by_age = [_rate_row(label, int(cases_by_age[g]), pop) for g, (label, _, _, pop) in enumerate(AGE_GROUPS)]
+    by_age.append(_rate_row("Total", int(is_case.sum()), int(is_case.size)))
+    return {"sex": by_sex, "age_group": by_age}
+
+
+def _rate_row(label: str, cases: int, population: int) -> dict[str, Any]:
+    return {"group": label, "cases": cases, "population": population, "attack_rate_pct": round(100 * cases / population, 1)}
+
+
+def cohort_summary(residents: dict[str, np.ndarray], is_case: np.ndarray, respondent: np.ndarray) -> dict[str, int]:
+    return {
+        "respondents": int(respondent.sum()),
+        "households": int(np.unique(residents["household"][respondent]).size),
+        "cases": int((is_case & respondent).sum()),
+        "non_cases": int((~is_case & respondent).sum()),
+    }
+
+
+def derive_model_answers(residents: dict[str, np.ndarray], is_case: np.ndarray, respondent: np.ndarray) -> dict[str, str]:
+    """Model answers for the ``table_calc`` items that this dataset determines.
+
+    Question 15 also needs the cohort exposure table, which is not part of
+    the content files, so only its denominators are derived.
+    """
+    rows = attack_rate_rows(residents, is_case)
+    total = int(is_case.sum())
+    lines = [
+        f"The numerator is {total}, the number of cases in this dataset; the denominator is {is_case.size}, the village population.",
+        "",
+        "Table 4a (sex): cases / population = attack rate",
+    ]
+    lines += [f"{r['group']}: {r['cases']} / {r['population']} = {r['attack_rate_pct']}%" for r in rows["sex"]]
+    lines += ["", "Table 4b (age group): cases / population = attack rate"]
+    lines += [f"{r['group']}: {r['cases']} / {r['population']} = {r['attack_rate_pct']}%" for r in rows["age_group"]]
+    cohort = cohort_summary(residents, is_case, respondent)
+    cohort_answer = (
+        f"The cohort study has {cohort['respondents']} respondents from {cohort['households']} households: "
+        f"{cohort['cases']} cases and {cohort['non_cases']} non-cases. These are the totals that the exposed "
+        "and unexposed groups in each row of the exposure table must add up to."
+    )
+    return {"Question_14": "\n".join(lines), "Question_15": cohort_answer}
+
+
+def generate_variants(labels: Iterable[str]) -> dict[str, dict[str, Any]]:
+    return {label: generate_variant(seed_for(label)) for label in labels}
+
+
+def main(argv: list[str] | None = None) -> int:
+    labels = (argv if argv is not None else sys.argv[1:]) or [f"group-{i}" for i in range(1, 41)]
+    started = time.perf_counter()
+    variants = generate_variants(labels)
+    elapsed = time.perf_counter() - started
+    for label, variant in variants.items():
+        cases = variant["line_list"]
+        first = min((c["onset"] for c in cases), default=None)
+        last = max((c["onset"] for c in cases), default=None)
+        print(f"{label:<16} cases={len(cases):>3}  onset {first or '-'} to {last or '-'}")
+    print(f"{len(variants)} variant(s) in {elapsed * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
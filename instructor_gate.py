@@ -1,14 +1,38 @@
+import hashlib
 import hmac
+import json
 import os
-from typing import Optional
+import secrets
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Optional
 
 import streamlit as st
+import streamlit.components.v1 as components
 from streamlit.errors import StreamlitSecretNotFoundError
 
+from case_content import BASE_DIR
+
 UNLOCKED_KEY = "instructor_unlocked"
 ENABLED_KEY = "instructor_enabled"
 ERROR_KEY = "instructor_unlock_error"
 INPUT_KEY = "instructor_unlock_input"
+TOKEN_CHECKED_KEY = "instructor_token_checked"
+TOKEN_KEY = "instructor_token"
+COOKIE_PENDING_KEY = "instructor_cookie_pending"
+
+# Signed unlock token kept in a browser cookie so a reconnect or reload stays
+# unlocked. Older builds put it in the URL; that parameter is stripped.
+TOKEN_COOKIE = "instructor_token"
+TOKEN_PARAM = "instructor_token"
+TOKEN_TTL_SECONDS = 12 * 60 * 60
+# Nonces of locked tokens, kept until they expire so a restart does not
+# bring them back.
+REVOKED_TOKENS_PATH = BASE_DIR / ".cache" / "revoked_instructor_tokens.json"
+
+_revoked_lock = threading.Lock()
+_revoked: Optional[dict[str, int]] = None
 
 
 def _init_state() -> None:
@@ -22,30 +46,179 @@ def _init_state() -> None:
         st.session_state[INPUT_KEY] = ""
 
 
-def _get_unlock_code() -> Optional[str]:
-    code = None
+def _get_setting(name: str) -> Optional[Any]:
+    value = None
     try:
-        code = st.secrets.get("INSTRUCTOR_UNLOCK_CODE")
+        value = st.secrets.get(name)
     except StreamlitSecretNotFoundError:
-        code = None
+        value = None
 
-    if code:
-        return str(code)
+    if value:
+        return value
 
-    env_code = os.environ.get("INSTRUCTOR_UNLOCK_CODE")
-    if env_code:
-        return str(env_code)
+    env_value = os.environ.get(name)
+    if env_value:
+        return env_value
 
     return None
 
 
+def _hash_code(code: str) -> bytes:
+    return hashlib.sha256(code.encode("utf-8")).digest()
+
+
+@lru_cache(maxsize=1)
+def _configured_code_hashes() -> tuple[bytes, ...]:
+    """SHA-256 of every configured unlock code, resolved once per process.
+
+    INSTRUCTOR_UNLOCK_CODE may be a single code, a comma-separated list, or a
+    list in secrets.toml.
+    """
+    configured = _get_setting("INSTRUCTOR_UNLOCK_CODE")
+    if configured is None:
+        return ()
+    codes = configured if isinstance(configured, (list, tuple)) else str(configured).split(",")
+    return tuple(_hash_code(str(code).strip()) for code in codes if str(code).strip())
+
+
+@lru_cache(maxsize=1)
+def _token_key() -> Optional[bytes]:
+    secret = _get_setting("INSTRUCTOR_TOKEN_SECRET")
+    if secret:
+        return _hash_code(str(secret))
+    hashes = _configured_code_hashes()
+    if not hashes:
+        return None
+    # Derived from the codes, so changing the codes (and clearing this cache)
+    # revokes issued tokens.
+    return hashlib.sha256(b"instructor-token\0" + b"".join(hashes)).digest()
+
+
+def clear_credential_cache() -> None:
+    """Re-read unlock codes and the token secret on next use."""
+    _configured_code_hashes.cache_clear()
+    _token_key.cache_clear()
+
+
+def _code_matches(entered_code: str) -> bool:
+    entered = _hash_code(entered_code)
+    matched = False
+    for configured in _configured_code_hashes():
+        matched |= hmac.compare_digest(entered, configured)
+    return matched
+
+
+def _sign(expires: int, nonce: str) -> str:
+    return hmac.new(_token_key(), f"instructor:{expires}:{nonce}".encode("ascii"), hashlib.sha256).hexdigest()
+
+
+def _issue_token() -> Optional[str]:
+    if _token_key() is None:
+        return None
+    expires = int(time.time()) + TOKEN_TTL_SECONDS
+    nonce = secrets.token_hex(16)
+    return f"{expires}.{nonce}.{_sign(expires, nonce)}"
+
+
+def _parse_token(token: str) -> Optional[tuple[int, str, str]]:
+    parts = token.split(".")
+    if len(parts) != 3 or not parts[0].isdigit() or not parts[1].isalnum():
+        return None
+    return int(parts[0]), parts[1], parts[2]
+
+
+def _revoked_nonces() -> dict[str, int]:
+    # Caller holds _revoked_lock.
+    global _revoked
+    if _revoked is None:
+        now = time.time()
+        try:
+            loaded = json.loads(REVOKED_TOKENS_PATH.read_text(encoding="utf-8"))
+            expiries = {str(n): int(e) for n, e in loaded.items()}
+        except (OSError, ValueError, TypeError, AttributeError):
+            # Missing or unreadable file: start with an empty set.
+            expiries = {}
+        _revoked = {n: e for n, e in expiries.items() if e >= now}
+    return _revoked
+
+
+def _revoke_token(token: str) -> None:
+    parsed = _parse_token(token)
+    if parsed is None:
+        return
+    expires, nonce, _ = parsed
+    with _revoked_lock:
+        revoked = _revoked_nonces()
+        now = time.time()
+        for stale in [n for n, e in revoked.items() if e < now]:
+            del revoked[stale]
+        revoked[nonce] = expires
+        try:
+            REVOKED_TOKENS_PATH.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = REVOKED_TOKENS_PATH.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(revoked), encoding="utf-8")
+            os.replace(tmp_path, REVOKED_TOKENS_PATH)
+        except OSError:
+            # Still revoked for the life of this process.
+            pass
+
+
+def _verify_token(token: str) -> bool:
+    if _token_key() is None:
+        return False
+    parsed = _parse_token(token)
+    if parsed is None:
+        return False
+    expires, nonce, signature = parsed
+    if expires < time.time() or not hmac.compare_digest(signature, _sign(expires, nonce)):
+        return False
+    with _revoked_lock:
+        return nonce not in _revoked_nonces()
+
+
+def _queue_cookie(token: str) -> None:
+    # Callbacks cannot render, so the cookie is written on the next run by
+    # instructor_gate_ui. An empty token clears it.
+    st.session_state[COOKIE_PENDING_KEY] = token
+
+
+def _write_pending_cookie() -> None:
+    token = st.session_state.pop(COOKIE_PENDING_KEY, None)
+    if token is None:
+        return
+    max_age = TOKEN_TTL_SECONDS if token else 0
+    components.html(
+        "<script>"
+        f"const value = {json.dumps(token)};"
+        "const secure = window.parent.location.protocol === 'https:' ? '; Secure' : '';"
+        f"window.parent.document.cookie = '{TOKEN_COOKIE}=' + value + '; Max-Age={max_age}; Path=/; SameSite=Strict' + secure;"
+        "</script>",
+        height=0,
+    )
+
+
+def _restore_from_token() -> None:
+    # Checked once per browser session; later reruns only read session state.
+    if st.session_state.get(TOKEN_CHECKED_KEY):
+        return
+    st.session_state[TOKEN_CHECKED_KEY] = True
+    if TOKEN_PARAM in st.query_params:
+        del st.query_params[TOKEN_PARAM]
+    token = st.context.cookies.get(TOKEN_COOKIE)
+    if not token:
+        return
+    if _verify_token(token):
+        st.session_state[UNLOCKED_KEY] = True
+        st.session_state[TOKEN_KEY] = token
+    else:
+        _queue_cookie("")
+
+
 def is_instructor_unlocked() -> bool:
-    _init_state()
     return bool(st.session_state.get(UNLOCKED_KEY, False))
 
 
 def instructor_mode_enabled() -> bool:
-    _init_state()
     return is_instructor_unlocked() and bool(st.session_state.get(ENABLED_KEY, False))
 
 
@@ -55,6 +228,10 @@ def lock_instructor() -> None:
     st.session_state[ENABLED_KEY] = False
     st.session_state[ERROR_KEY] = None
     st.session_state[INPUT_KEY] = ""
+    token = st.session_state.pop(TOKEN_KEY, None)
+    if token:
+        _revoke_token(token)
+        _queue_cookie("")
 
 
 def set_instructor_enabled(enabled: bool) -> None:
@@ -65,16 +242,20 @@ def set_instructor_enabled(enabled: bool) -> None:
         st.session_state[ENABLED_KEY] = False
 
 
-def _unlock_attempt(configured_code: Optional[str]) -> None:
+def _unlock_attempt() -> None:
     entered_code = str(st.session_state.get(INPUT_KEY, ""))
-    if not configured_code:
+    if not _configured_code_hashes():
         st.session_state[ERROR_KEY] = "Unlock code not configured."
         return
 
-    if hmac.compare_digest(entered_code, configured_code):
+    if _code_matches(entered_code):
         st.session_state[UNLOCKED_KEY] = True
         st.session_state[ERROR_KEY] = None
         st.session_state[INPUT_KEY] = ""
+        token = _issue_token()
+        if token:
+            st.session_state[TOKEN_KEY] = token
+            _queue_cookie(token)
     else:
         st.session_state[UNLOCKED_KEY] = False
         st.session_state[ENABLED_KEY] = False
@@ -88,7 +269,8 @@ def instructor_gate_ui(
     help_text: str | None = None,
 ) -> None:
     _init_state()
-    configured_code = _get_unlock_code()
+    _restore_from_token()
+    _write_pending_cookie()
 
     container = st.sidebar if location == "sidebar" else st
     container.subheader(label)
@@ -103,11 +285,11 @@ def instructor_gate_ui(
             key=INPUT_KEY,
             placeholder="Enter instructor unlock code",
         )
-        container.button("Unlock", key=f"unlock_btn_{location}_{label}", use_container_width=True, on_click=_unlock_attempt, kwargs={"configured_code": configured_code})
+        container.button("Unlock", key=f"unlock_btn_{location}_{label}", use_container_width=True, on_click=_unlock_attempt)
 
         if st.session_state.get(ERROR_KEY):
             container.warning(st.session_state[ERROR_KEY])
-        elif not configured_code:
+        elif not _configured_code_hashes():
             container.warning("Unlock code not configured.")
         return
 
@@ -0,0 +1,442 @@
+"""Classroom load generator for a locally running ``streamlit run app.py``.
+
+Opens N simulated browser sessions over Streamlit's websocket protocol and
+replays participant behaviour (guided Next/Back, typing answers, table
+Compute, Review-tab visits) to measure rerun latency and server cost as the
+class size grows.
+
+    streamlit run app.py --server.headless true &
+    python load_test.py --sessions 5,10,20,40 --server-pid $!
+
+Use ``--spawn`` to have the harness start (and stop) the server itself.
+Before the first step one unmeasured session warms the server up, so the
+first step does not also pay for the cold start. The ``websockets`` client
+is installed with Streamlit. Server CPU and RSS are read with ``psutil`` when it is installed, otherwise
+from ``/proc`` (Linux only).
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Optional
+
+import websockets
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+BASE_DIR = Path(__file__).resolve().parent
+WIDGET_ID_PREFIX = "$$ID-"
+NEXT_LABEL = "Next ➡️"
+PREVIOUS_LABEL = "⬅️ Previous"
+WARM_UP_ACTIONS = 10
+
+# Relative weights of simulated participant actions.
+ACTION_WEIGHTS = {
+    "next": 0.35,
+    "back": 0.05,
+    "type": 0.35,
+    "compute": 0.10,
+    "review": 0.15,
+}
+
+SAMPLE_ANSWERS = [
+    "Yes, more cases than expected in a defined place and time.",
+    "Ministry of Health, Ministry of Agriculture, district veterinary office.",
+    "Contact with meat from the cow that died suddenly on 11th April.",
+    "Look for cases at health centres, schools and through village leaders.",
+]
+
+
+def percentile(values: list[float], pct: float) -> float:
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    lo = int(rank)
+    hi = min(lo + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (rank - lo)
+
+
+def widget_key(widget_id: str) -> str | None:
+    """Return the user ``key=`` a widget was created with, if any."""
+    if not widget_id.startswith(WIDGET_ID_PREFIX):
+        return None
+    parts = widget_id.split("-", 2)
+    if len(parts) < 3 or parts[2] == "None":
+        return None
+    return parts[2]
+
+
+@dataclass
+class Widget:
+    id: str
+    kind: str
+    label: str
+    key: str | None
+
+
+@dataclass
+class SessionStats:
+    latencies_ms: list[float] = field(default_factory=list)
+    actions: dict[str, int] = field(default_factory=dict)
+    errors: int = 0
+
+
+class SimulatedParticipant:
+    """One browser tab talking to the Streamlit server over its websocket."""
+
+    def __init__(self, url: str, rng: random.Random, think_time: float, timeout: float) -> None:
+        self.url = url
+        self.rng = rng
+        self.think_time = think_time
+        self.timeout = timeout
+        self.conn: Any = None
+        self.widgets: dict[str, Widget] = {}
+        self.widget_states: dict[str, WidgetState] = {}
+        self.stats = SessionStats()
+
+    async def connect(self) -> None:
+        # Script output (tables, charts) can exceed the default 1 MiB frame limit.
+        self.conn = await websockets.connect(self.url, subprotocols=["streamlit"], max_size=None)
+
+    async def close(self) -> None:
+        if self.conn is not None:
+            await self.conn.close()
+            self.conn = None
+
+    async def rerun(self, trigger: WidgetState | None = None) -> None:
+        msg = BackMsg()
+        # Select the rerun_script oneof even when no widget states are sent;
+        # reading the sub-message alone leaves the BackMsg empty.
+        msg.rerun_script.SetInParent()
+        states = msg.rerun_script.widget_states
+        for state in self.widget_states.values():
+            states.widgets.append(state)
+        if trigger is not None:
+            states.widgets.append(trigger)
+
+        self.widgets = {}
+        started = time.perf_counter()
+        await self.conn.send(msg.SerializeToString())
+        await asyncio.wait_for(self._read_until_finished(), timeout=self.timeout)
+        self.stats.latencies_ms.append((time.perf_counter() - started) * 1000)
+
+    async def _read_until_finished(self) -> None:
+        while True:
+            try:
+                raw = await self.conn.recv()
+            except websockets.ConnectionClosed as exc:
+                raise ConnectionError("server closed the websocket") from exc
+            if isinstance(raw, str):
+                continue
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta":
+                self._record_widget(fwd)
+            elif kind == "script_finished":
+                if fwd.script_finished == ForwardMsg.FINISHED_EARLY_FOR_RERUN:
+                    # st.rerun() inside the script: the real result follows.
+                    self.widgets = {}
+                    continue
+                return
+            elif kind == "session_event" and fwd.session_event.HasField("script_compilation_exception"):
+                raise RuntimeError("app failed to compile")
+
+    def _record_widget(self, fwd: ForwardMsg) -> None:
+        delta = fwd.delta
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind is None:
+            return
+        proto = getattr(element, kind)
+        widget_id = getattr(proto, "id", "")
+        if not widget_id:
+            return
+        self.widgets[widget_id] = Widget(
+            id=widget_id,
+            kind=kind,
+            label=getattr(proto, "label", ""),
+            key=widget_key(widget_id),
+        )
+
+    def _find(self, *, label: str | None = None, key_prefix: str | None = None, kind: str | None = None) -> list[Widget]:
+        found = []
+        for w in self.widgets.values():
+            if kind and w.kind != kind:
+                continue
+            if label is not None and w.label != label:
+                continue
+            if key_prefix is not None and not (w.key or "").startswith(key_prefix):
+                continue
+            found.append(w)
+        return found
+
+    def _trigger(self, widget: Widget) -> WidgetState:
+        state = WidgetState(id=widget.id)
+        state.trigger_value = True
+        return state
+
+    def _plan(self, action: str) -> tuple[str, WidgetState | None] | None:
+        if action in {"next", "back"}:
+            buttons = self._find(label=NEXT_LABEL if action == "next" else PREVIOUS_LABEL, kind="button")
+            return (action, self._trigger(buttons[0])) if buttons else None
+
+        if action == "type":
+            areas = self._find(key_prefix="text_", kind="text_area")
+            if not areas:
+                return None
+            area = self.rng.choice(areas)
+            previous = self.widget_states.get(area.id)
+            text = (previous.string_value + " " if previous else "") + self.rng.choice(SAMPLE_ANSWERS)
+            state = WidgetState(id=area.id)
+            state.string_value = text
+            self.widget_states[area.id] = state
+            return action, None
+
+        if action == "compute":
+            computes = self._find(key_prefix="compute_", kind="button")
+            if not computes:
+                # Navigate to a table question first, like a participant would.
+                gos = [w for w in self._find(key_prefix="go_", kind="button") if w.key in {"go_Question_14", "go_Question_15"}]
+                return ("review", self._trigger(self.rng.choice(gos))) if gos else None
+            button = self.rng.choice(computes)
+            qid = (button.key or "").removeprefix("compute_")
+            for editor in self._find(key_prefix=f"table_{qid}"):
+                edits = {
+                    "edited_rows": {str(row): {"Value": round(self.rng.uniform(0, 60), 1)} for row in range(3)},
+                    "added_rows": [],
+                    "deleted_rows": [],
+                }
+                state = WidgetState(id=editor.id)
+                state.string_value = json.dumps(edits)
+                self.widget_states[editor.id] = state
+            return action, self._trigger(button)
+
+        if action == "review":
+            gos = self._find(key_prefix="go_", kind="button")
+            return (action, self._trigger(self.rng.choice(gos))) if gos else None
+
+        return None
+
+    def choose_action(self) -> tuple[str, WidgetState | None]:
+        names = list(ACTION_WEIGHTS)
+        weights = list(ACTION_WEIGHTS.values())
+        for _ in range(5):
+            plan = self._plan(self.rng.choices(names, weights=weights)[0])
+            if plan is not None:
+                return plan
+        return self._plan("next") or self._plan("back") or ("idle", None)
+
+    async def run(self, actions: int) -> SessionStats:
+        try:
+            await self.connect()
+            await self.rerun()
+            for _ in range(actions):
+                await asyncio.sleep(self.rng.expovariate(1 / self.think_time) if self.think_time > 0 else 0)
+                name, trigger = self.choose_action()
+                self.stats.actions[name] = self.stats.actions.get(name, 0) + 1
+                try:
+                    await self.rerun(trigger)
+                except (asyncio.TimeoutError, ConnectionError):
+                    self.stats.errors += 1
+                    break
+        except Exception as exc:  # noqa: BLE001 - report and keep the other sessions running
+            print(f"session error: {exc!r}", file=sys.stderr)
+            self.stats.errors += 1
+        return self.stats
+
+
+class ServerSampler:
+    """CPU and RSS of the Streamlit server process."""
+
+    def __init__(self, pid: int) -> None:
+        self.pid = pid
+        self._proc = psutil.Process(pid) if psutil is not None else None
+        self._ticks = os.sysconf("SC_CLK_TCK") if self._proc is None else 0
+
+    def cpu_seconds(self) -> float:
+        if self._proc is not None:
+            times = self._proc.cpu_times()
+            return times.user + times.system
+        fields = Path(f"/proc/{self.pid}/stat").read_text().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / self._ticks
+
+    def rss_mb(self) -> float:
+        if self._proc is not None:
+            return self._proc.memory_info().rss / 2**20
+        for line in Path(f"/proc/{self.pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+        return float("nan")
+
+
+async def warm_up(args: argparse.Namespace) -> None:
+    """Run one unmeasured session so the first step does not include the server's cold start."""
+    url = f"ws://{args.host}:{args.port}/_stcore/stream"
+    participant = SimulatedParticipant(url, random.Random(args.seed), 0.0, args.timeout)
+    try:
+        stats = await participant.run(WARM_UP_ACTIONS)
+    finally:
+        await participant.close()
+    if stats.errors:
+        raise RuntimeError("warm-up session failed; is the app running at this address?")
+
+
+async def run_step(args: argparse.Namespace, n_sessions: int, sampler: Optional[ServerSampler]) -> dict[str, Any]:
+    url = f"ws://{args.host}:{args.port}/_stcore/stream"
+    participants = [
+        SimulatedParticipant(url, random.Random(args.seed * 100_003 + n_sessions * 1_009 + i), args.think_time, args.timeout)
+        for i in range(n_sessions)
+    ]
+
+    rss_before = sampler.rss_mb() if sampler else float("nan")
+    cpu_before = sampler.cpu_seconds() if sampler else 0.0
+    peak_rss = rss_before
+
+    async def watch_rss() -> None:
+        nonlocal peak_rss
+        while True:
+            await asyncio.sleep(0.5)
+            peak_rss = max(peak_rss, sampler.rss_mb())
+
+    watcher = asyncio.create_task(watch_rss()) if sampler else None
+    started = time.perf_counter()
+    try:
+        results = await asyncio.gather(*(p.run(args.actions) for p in participants))
+    finally:
+        elapsed = time.perf_counter() - started
+        if watcher:
+            watcher.cancel()
+        await asyncio.gather(*(p.close() for p in participants))
+
+    latencies = [ms for r in results for ms in r.latencies_ms]
+    actions: dict[str, int] = {}
+    for r in results:
+        for name, count in r.actions.items():
+            actions[name] = actions.get(name, 0) + count
+
+    row: dict[str, Any] = {
+        "sessions": n_sessions,
+        "reruns": len(latencies),
+        "errors": sum(r.errors for r in results),
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "mean_ms": statistics.fmean(latencies) if latencies else float("nan"),
+        "elapsed_s": elapsed,
+        "actions": actions,
+    }
+    if sampler:
+        cpu_used = sampler.cpu_seconds() - cpu_before
+        row["cpu_pct"] = 100 * cpu_used / elapsed if elapsed else float("nan")
+        row["cpu_ms_per_rerun"] = 1000 * cpu_used / len(latencies) if latencies else float("nan")
+        row["rss_mb"] = peak_rss
+        row["rss_mb_per_session"] = (peak_rss - rss_before) / n_sessions
+    return row
+
+
+def wait_for_health(host: str, port: int, timeout: float) -> None:
+    deadline = time.monotonic() + timeout
+    url = f"http://{host}:{port}/_stcore/health"
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(url, timeout=2) as resp:
+                if resp.status == 200:
+                    return
+        except OSError:
+            pass
+        time.sleep(0.5)
+    raise TimeoutError(f"Streamlit server did not become healthy at {url}")
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    cmd = [
+        sys.executable, "-m", "streamlit", "run", str(BASE_DIR / "app.py"),
+        "--server.headless", "true",
+        "--server.port", str(port),
+        "--browser.gatherUsageStats", "false",
+    ]
+    return subprocess.Popen(cmd, cwd=BASE_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def format_row(row: dict[str, Any]) -> str:
+    text = (
+        f"{row['sessions']:>8} {row['reruns']:>7} {row['errors']:>6} "
+        f"{row['p50_ms']:>8.0f} {row['p95_ms']:>8.0f} {row['p99_ms']:>8.0f}"
+    )
+    if "cpu_pct" in row:
+        text += f" {row['cpu_pct']:>7.0f} {row['cpu_ms_per_rerun']:>9.1f} {row['rss_mb']:>8.0f} {row['rss_mb_per_session']:>10.2f}"
+    return text
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=8501)
+    parser.add_argument("--sessions", default="5,10,20,40", help="comma-separated session counts to ramp through")
+    parser.add_argument("--actions", type=int, default=30, help="actions replayed by each session")
+    parser.add_argument("--think-time", type=float, default=1.0, help="mean seconds between actions")
+    parser.add_argument("--timeout", type=float, default=30.0, help="seconds before a rerun counts as failed")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--server-pid", type=int, help="PID of the Streamlit server, for CPU/RSS sampling")
+    parser.add_argument("--spawn", action="store_true", help="start the Streamlit server for the run")
+    parser.add_argument("--json", type=Path, help="also write results to this JSON file")
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    steps = [int(n) for n in args.sessions.split(",") if n.strip()]
+
+    server = None
+    pid = args.server_pid
+    if args.spawn:
+        server = spawn_server(args.port)
+        pid = server.pid
+    try:
+        wait_for_health(args.host, args.port, timeout=60)
+        sampler = ServerSampler(pid) if pid else None
+
+        header = f"{'sessions':>8} {'reruns':>7} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+        if sampler:
+            header += f" {'cpu %':>7} {'cpu ms/rr':>9} {'rss MB':>8} {'MB/sess':>10}"
+        print(header)
+
+        asyncio.run(warm_up(args))
+        rows = []
+        for n in steps:
+            row = asyncio.run(run_step(args, n, sampler))
+            rows.append(row)
+            print(format_row(row), flush=True)
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait(timeout=10)
+
+    if args.json:
+        args.json.write_text(json.dumps(rows, indent=2), encoding="utf-8")
+    return 1 if any(r["errors"] for r in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+"""Structured outbreak data parsed from the case study content files."""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from datetime import date
+from pathlib import Path
+from typing import Any
+
+LINE_LIST_ROW = re.compile(
+    r"^\s*(?P<case_no>\d+)\s*\|\s*(?P<district>[^|]*)\|\s*(?P<subcounty>[^|]*)\|\s*(?P<village>[^|]*)\|"
+    r"\s*(?P<sex>[MF])\s*\|\s*(?P<age>\d+)\s*\|\s*(?P<category>[^|]*)\|\s*(?P<onset>\d{1,2}/\d{1,2}/\d{2})\s*\|"
+    r"\s*(?P<lab_investigated>[01])\s*\|\s*(?P<lab_result>[^|]*)$"
+)
+
+ANTHRAX_CATEGORIES = {
+    "Cutan-Only": "Cutaneous only",
+    "GI-Only": "Gastrointestinal only",
+    "Cutan-GI": "Cutaneous and gastrointestinal",
+}
+
+# Sudden cattle deaths in Kaplobotwo as reported in Part A (n=10).
+CATTLE_DEATHS = {
+    date(2018, 4, 11): 1,
+    date(2018, 4, 22): 1,
+    date(2018, 4, 23): 7,
+    date(2018, 4, 29): 1,
+}
+
+
+def dataset_version(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:12]
+
+
+def parse_onset(raw: str) -> date:
+    day, month, year = (int(x) for x in raw.split("/"))
+    return date(2000 + year, month, day)
+
+
+def parse_line_list(md_text: str) -> list[dict[str, Any]]:
+    """Parse the Appendix 3 line list table into one dict per case."""
+    cases = []
+    for line in md_text.splitlines():
+        m = LINE_LIST_ROW.match(line)
+        if not m:
+            continue
+        cases.append(
+            {
+                "case_no": int(m.group("case_no")),
+                "district": m.group("district").strip(),
+                "subcounty": m.group("subcounty").strip(),
+                "village": m.group("village").strip(),
+                "sex": m.group("sex"),
+                "age": int(m.group("age")),
+                "category": m.group("category").strip(),
+                "onset": parse_onset(m.group("onset")),
+                "lab_investigated": m.group("lab_investigated") == "1",
+                "lab_result": m.group("lab_result").strip() or None,
+            }
+        )
+    return cases
+
+
+def load_line_list(path: str | Path) -> list[dict[str, Any]]:
+    return parse_line_list(Path(path).read_text(encoding="utf-8"))
@@ -0,0 +1,37 @@
+"""In-process broadcast of the facilitator's pacing limit to participant sessions.
+
+All Streamlit sessions of one app run in the same server process, so a
+single shared ``PacingChannel`` (held with ``st.cache_resource``) is enough
+to reach every live session. Publishing swaps one immutable snapshot;
+sessions read it on their next rerun without touching files or a database.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Optional
+
+
+@dataclass(frozen=True)
+class PacingState:
+    # Furthest section participants may open; None means everything is open.
+    max_section: Optional[str] = None
+    version: int = 0
+
+
+class PacingChannel:
+    """Latest-value broadcast of the pacing limit."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._state = PacingState()
+
+    @property
+    def state(self) -> PacingState:
+        return self._state
+
+    def publish(self, max_section: str | None) -> PacingState:
+        with self._lock:
+            self._state = PacingState(max_section, self._state.version + 1)
+            return self._state
@@ -0,0 +1,270 @@
+"""Batch generation of per-participant workbooks from exported answers.
+
+Participants download their answers from the Review tab ("Download my
+answers"). Collect those JSON files in one folder and run:
+
+    python reports.py answers/ --out workbooks/ [--instructor] [--pdf]
+
+The case study narrative, question prompts and charts are rendered to HTML
+once in the parent process and handed to each worker of a process pool,
+which only fills in one participant's answers and writes the file as soon
+as it is finished. Charts are embedded as static SVG, so workbooks need no
+network or JavaScript; converting the chart specs needs the optional
+``vl-convert-python`` package (or pass ``--no-charts``). ``--pdf`` needs the
+optional ``weasyprint`` package; narrative markdown uses ``markdown`` when
+installed and a plain paragraph renderer otherwise.
+"""
+
+from __future__ import annotations
+
+import argparse
+import html
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Optional
+
+from case_content import (
+    CHART_CACHE_DIR,
+    ITEMS_JSON_PATH,
+    LINE_LIST_PATH,
+    PART_FILES,
+    PLACEHOLDER_PATTERN,
+    normalize_placeholder_id,
+)
+from charts import CHART_PATTERN, load_chart_spec
+from cohort_generator import generate_variant, seed_for
+
+try:
+    import markdown
+except ImportError:
+    markdown = None
+
+try:
+    import vl_convert
+except ImportError:
+    vl_convert = None
+
+try:
+    import weasyprint
+except ImportError:
+    weasyprint = None
+
+WORKBOOK_CSS = """
+body { font-family: sans-serif; color: #1a1a1a; max-width: 52rem; margin: 2rem auto; line-height: 1.5; }
+h1 { color: #0065a4; }
+h2 { border-bottom: 2px solid #dbe4ee; padding-bottom: 0.3rem; margin-top: 2.5rem; }
+.question { border: 1px solid #dbe4ee; border-radius: 0.6rem; padding: 0.8rem 1rem; margin: 1rem 0; page-break-inside: avoid; }
+.question h3 { margin: 0 0 0.4rem; background: #fffbeb; border-left: 6px solid #f59e0b; padding: 0.3rem 0.6rem; }
+.answer { background: #f8fafc; border-left: 4px solid #0065a4; padding: 0.5rem 0.8rem; white-space: pre-wrap; }
+.empty { color: #64748b; font-style: italic; }
+.model { background: #ecfdf3; border-left: 4px solid #16a34a; padding: 0.5rem 0.8rem; white-space: pre-wrap; }
+table { border-collapse: collapse; margin: 0.5rem 0; }
+td, th { border: 1px solid #cbd5e1; padding: 0.25rem 0.5rem; }
+.chart { margin: 1rem 0; }
+.chart svg { max-width: 100%; height: auto; }
+"""
+
+_SHARED: Optional[dict[str, Any]] = None
+
+
+def markdown_to_html(md_text: str) -> str:
+    if markdown is not None:
+        return markdown.markdown(md_text)
+    blocks = []
+    for block in re.split(r"\n\s*\n", md_text.strip()):
+        heading = re.match(r"^(#{1,6})\s+(.*)$", block.strip())
+        if heading:
+            level = len(heading.group(1))
+            blocks.append(f"<h{level}>{html.escape(heading.group(2))}</h{level}>")
+        elif block.strip():
+            blocks.append("<p>" + "<br>".join(html.escape(line) for line in block.strip().splitlines()) + "</p>")
+    return "\n".join(blocks)
+
+
+def chart_svg(name: str) -> str:
+    return vl_convert.vegalite_to_svg(load_chart_spec(name, LINE_LIST_PATH, CHART_CACHE_DIR))
+
+
+def narrative_to_html(md_text: str, charts: Optional[dict[str, str]]) -> str:
+    """Render narrative markdown; ``charts`` memoises SVG per chart, None skips charts."""
+    parts = []
+    last = 0
+    for match in CHART_PATTERN.finditer(md_text):
+        parts.append(markdown_to_html(md_text[last:match.start()]))
+        name = match.group(1)
+        if charts is not None:
+            if name not in charts:
+                charts[name] = chart_svg(name)
+            parts.append(f"<figure class='chart'>{charts[name]}</figure>")
+        last = match.end()
+    parts.append(markdown_to_html(md_text[last:]))
+    return "\n".join(p for p in parts if p)
+
+
+def build_shared_content(include_model_answers: bool, include_charts: bool = True) -> dict[str, Any]:
+    """Render everything that is the same for every participant."""
+    payload = json.loads(ITEMS_JSON_PATH.read_text(encoding="utf-8"))
+    items_by_id = {item["id"]: item for item in payload["items"]}
+    charts: Optional[dict[str, str]] = {} if include_charts else None
+
+    questions = {}
+    for qid, item in items_by_id.items():
+        model = item.get("instructor_mode", {}).get("model_answer") if include_model_answers else None
+        if model is not None and not isinstance(model, str):
+            model = json.dumps(model, ensure_ascii=False, indent=2)
+        questions[qid] = {
+            "title": f"Question {qid.removeprefix('Question_')}",
+            "prompt": markdown_to_html(item.get("prompt", "")),
+            "model": html.escape(model) if model else None,
+        }
+
+    # Each section is a list of ("html", text) and ("question", qid) segments.
+    sections = []
+    for section, path in PART_FILES.items():
+        if not path.exists():
+            continue
+        md_text = path.read_text(encoding="utf-8")
+        segments: list[tuple[str, str]] = []
+        last = 0
+        for match in PLACEHOLDER_PATTERN.finditer(md_text):
+            segments.append(("html", narrative_to_html(md_text[last:match.start()], charts)))
+            qid = normalize_placeholder_id(match.group(1))
+            if qid in questions:
+                segments.append(("question", qid))
+            last = match.end()
+        segments.append(("html", narrative_to_html(md_text[last:], charts)))
+        sections.append((section, segments))
+
+    return {
+        "title": payload.get("title", "Anthrax Case Study"),
+        "module_id": payload.get("module_id"),
+        "questions": questions,
+        "sections": sections,
+        "include_model_answers": include_model_answers,
+    }
+
+
+def render_response(response: Any) -> str:
+    if response is None or (isinstance(response, str) and not response.strip()):
+        return "<div class='answer empty'>No response.</div>"
+    if isinstance(response, list) and response and all(isinstance(r, dict) for r in response):
+        columns = list(dict.fromkeys(k for row in response for k in row))
+        head = "".join(f"<th>{html.escape(str(c))}</th>" for c in columns)
+        body = "".join(
+            "<tr>" + "".join(f"<td>{html.escape(str(row.get(c, '')))}</td>" for c in columns) + "</tr>" for row in response
+        )
+        return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>"
+    if not isinstance(response, str):
+        response = json.dumps(response, ensure_ascii=False, indent=2)
+    return f"<div class='answer'>{html.escape(response)}</div>"
+
+
+def render_question(shared: dict[str, Any], qid: str, entry: dict[str, Any], variant_answers: dict[str, str]) -> str:
+    q = shared["questions"][qid]
+    status = "✅ complete" if entry.get("done") else ""
+    out = [f"<div class='question'><h3>{html.escape(q['title'])} <small>{status}</small></h3>", q["prompt"]]
+    out.append(render_response(entry.get("response")))
+    computed = entry.get("computed")
+    if computed:
+        totals = ", ".join(f"{html.escape(str(k))}: {v:g}" for k, v in computed.get("numeric_column_totals", {}).items())
+        out.append(f"<p><strong>Computed:</strong> {computed.get('rows', 0)} row(s){'; ' + totals if totals else ''}</p>")
+    model = html.escape(variant_answers[qid]) if qid in variant_answers else q["model"]
+    if model:
+        out.append(f"<p><strong>Suggested response</strong></p><div class='model'>{model}</div>")
+    out.append("</div>")
+    return "\n".join(out)
+
+
+def render_workbook(shared: dict[str, Any], answers: dict[str, Any]) -> str:
+    participant = answers.get("participant") or "Participant"
+    responses = answers.get("responses", {})
+    group = answers.get("dataset_group")
+    # Participants on a group dataset get model answers derived from that dataset.
+    variant_answers = generate_variant(seed_for(group))["model_answers"] if group and shared["include_model_answers"] else {}
+    body = [f"<h1>{html.escape(shared['title'])}</h1>", f"<p><strong>Workbook for:</strong> {html.escape(participant)}</p>"]
+    if group:
+        body.append(f"<p><strong>Dataset group:</strong> {html.escape(group)}</p>")
+    for section, segments in shared["sections"]:
+        body.append(f"<h2>{html.escape(section)}</h2>")
+        for kind, value in segments:
+            body.append(value if kind == "html" else render_question(shared, value, responses.get(value, {}), variant_answers))
+    return (
+        "<!DOCTYPE html><html><head><meta charset='utf-8'>"
+        f"<title>{html.escape(participant)} — {html.escape(shared['title'])}</title>"
+        f"<style>{WORKBOOK_CSS}</style></head><body>{''.join(body)}</body></html>"
+    )
+
+
+def _init_worker(shared: dict[str, Any]) -> None:
+    global _SHARED
+    _SHARED = shared
+
+
+def load_answers(answers_path: Path) -> dict[str, Any]:
+    answers = json.loads(answers_path.read_text(encoding="utf-8"))
+    if not isinstance(answers, dict) or not isinstance(answers.get("responses"), dict):
+        raise ValueError("not an answers export: expected an object with a 'responses' object")
+    if not all(isinstance(entry, dict) for entry in answers["responses"].values()):
+        raise ValueError("not an answers export: every response must be an object")
+    if answers.get("dataset_group") is not None and not isinstance(answers["dataset_group"], str):
+        raise ValueError("not an answers export: 'dataset_group' must be a string")
+    return answers
+
+
+def write_workbook(answers_path: Path, out_dir: Path, pdf: bool) -> Path:
+    answers = load_answers(answers_path)
+    document = render_workbook(_SHARED, answers)
+    # Input file names are unique within the folder, participant names may not be.
+    if pdf:
+        target = out_dir / f"{answers_path.stem}.pdf"
+        weasyprint.HTML(string=document).write_pdf(target)
+    else:
+        target = out_dir / f"{answers_path.stem}.html"
+        target.write_text(document, encoding="utf-8")
+    return target
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Render one workbook per exported answers file.")
+    parser.add_argument("answers_dir", type=Path, help="folder of answers JSON files downloaded from the app")
+    parser.add_argument("--out", type=Path, default=Path("workbooks"))
+    parser.add_argument("--instructor", action="store_true", help="include model answers")
+    parser.add_argument("--pdf", action="store_true", help="write PDF instead of HTML (requires weasyprint)")
+    parser.add_argument("--no-charts", action="store_true", help="leave out charts (no vl-convert-python needed)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args(argv)
+
+    if args.pdf and weasyprint is None:
+        parser.error("--pdf requires the weasyprint package")
+    if not args.no_charts and vl_convert is None:
+        parser.error("charts require the vl-convert-python package; install it or pass --no-charts")
+    answer_files = sorted(args.answers_dir.glob("*.json"))
+    if not answer_files:
+        parser.error(f"no .json files in {args.answers_dir}")
+    args.out.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    shared = build_shared_content(args.instructor, include_charts=not args.no_charts)
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(shared,)) as pool:
+        futures = {pool.submit(write_workbook, path, args.out, args.pdf): path for path in answer_files}
+        for done, future in enumerate(as_completed(futures), start=1):
+            try:
+                target = future.result()
+                print(f"[{done}/{len(futures)}] {target}")
+            except Exception as exc:  # noqa: BLE001 - report the file and keep the batch going
+                failures += 1
+                print(f"[{done}/{len(futures)}] {futures[future]}: {exc}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - started
+    print(f"{len(answer_files) - failures} workbook(s) in {elapsed:.1f}s")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,220 @@
+"""Low-overhead interaction telemetry for the case study app.
+
+Each browser session owns an ``EventRecorder`` whose ``record`` call only
+appends a tuple to a bounded deque. A single background ``BatchFlusher``
+thread per process drains every recorder on an interval and appends the
+events to a JSON Lines file, so no file I/O happens during a rerun.
+
+Run this module on a log to get a time-per-question report:
+
+    python telemetry.py .telemetry/events.jsonl
+"""
+
+from __future__ import annotations
+
+import argparse
+import atexit
+import json
+import statistics
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+DEFAULT_CAPACITY = 512
+DEFAULT_FLUSH_INTERVAL = 5.0
+# Recorders with nothing to flush are forgotten after this long without events.
+IDLE_RECORDER_TTL = 3600.0
+# A rerun on the same step records a ``heartbeat`` at most this often, so a
+# visit's end is known even when the participant never moves on.
+HEARTBEAT_INTERVAL = 30.0
+
+
+class EventRecorder:
+    """Fixed-size ring buffer of events for one session."""
+
+    def __init__(self, session_id: str | None = None, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.session_id = session_id or uuid.uuid4().hex
+        self.buffer: deque[tuple[float, str, Optional[str], Optional[str], Optional[dict[str, Any]]]] = deque(maxlen=capacity)
+        self.dropped = 0
+        self.last_event = time.time()
+        self.registered = False
+
+    def record(self, event: str, section: str | None = None, qid: str | None = None, **detail: Any) -> None:
+        if len(self.buffer) == self.buffer.maxlen:
+            self.dropped += 1
+        self.last_event = time.time()
+        self.buffer.append((self.last_event, event, section, qid, detail or None))
+
+    def drain(self) -> list[dict[str, Any]]:
+        events = []
+        while self.buffer:
+            try:
+                ts, event, section, qid, detail = self.buffer.popleft()
+            except IndexError:
+                break
+            row = {"ts": ts, "session": self.session_id, "event": event, "section": section, "qid": qid}
+            if detail:
+                row["detail"] = detail
+            events.append(row)
+        return events
+
+
+class BatchFlusher:
+    """Background thread that writes all registered recorders to a JSONL file."""
+
+    def __init__(self, path: str | Path, interval: float = DEFAULT_FLUSH_INTERVAL, capacity: int = DEFAULT_CAPACITY) -> None:
+        self.path = Path(path)
+        self.interval = interval
+        self.capacity = capacity
+        self._recorders: list[EventRecorder] = []
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="telemetry-flusher", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def new_recorder(self) -> EventRecorder:
+        return self.register(EventRecorder(capacity=self.capacity))
+
+    def register(self, recorder: EventRecorder) -> EventRecorder:
+        with self._lock:
+            if not recorder.registered:
+                recorder.registered = True
+                self._recorders.append(recorder)
+        return recorder
+
+    def flush(self) -> int:
+        now = time.time()
+        with self._lock:
+            recorders = list(self._recorders)
+        events = []
+        idle = []
+        for recorder in recorders:
+            drained = recorder.drain()
+            if recorder.dropped:
+                drained.append({"ts": now, "session": recorder.session_id, "event": "dropped", "section": None, "qid": None, "detail": {"count": recorder.dropped}})
+                recorder.dropped = 0
+            if drained:
+                events.extend(drained)
+            elif now - recorder.last_event > IDLE_RECORDER_TTL:
+                idle.append(recorder)
+        if idle:
+            with self._lock:
+                for recorder in idle:
+                    recorder.registered = False
+                self._recorders = [r for r in self._recorders if r.registered]
+        if events:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write("".join(json.dumps(e, ensure_ascii=False) + "\n" for e in events))
+        return len(events)
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.flush()
+            except OSError as exc:
+                print(f"telemetry flush failed: {exc}", file=sys.stderr)
+
+    def close(self) -> None:
+        self._stop.set()
+        self.flush()
+
+
+def read_events(path: str | Path) -> list[dict[str, Any]]:
+    events = []
+    with Path(path).open("r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                events.append(json.loads(line))
+    return events
+
+
+def dwell_times(
+    events: Iterable[dict[str, Any]], max_dwell: float
+) -> tuple[dict[tuple[str, str | None], list[float]], dict[tuple[str, str | None], int]]:
+    """Seconds spent on each (section, question) step, one entry per visit.
+
+    A visit starts at a ``step`` event and ends at the session's next ``step``
+    event, or at its last recorded event (usually a heartbeat). Visits are
+    capped at ``max_dwell`` so participants who walked away do not skew the
+    averages. A final visit with no later event has an unknown length; it is
+    left out of the dwell times and counted as an open visit instead, which
+    is where sessions stalled or ended.
+    """
+    by_session: dict[str, list[dict[str, Any]]] = defaultdict(list)
+    for e in events:
+        by_session[e["session"]].append(e)
+
+    dwell: dict[tuple[str, str | None], list[float]] = defaultdict(list)
+    open_visits: dict[tuple[str, str | None], int] = defaultdict(int)
+    for session_events in by_session.values():
+        session_events.sort(key=lambda e: e["ts"])
+        last_ts = session_events[-1]["ts"]
+        steps = [e for e in session_events if e["event"] == "step"]
+        for current, following in zip(steps, steps[1:] + [None]):
+            key = (current["section"], current["qid"])
+            end = following["ts"] if following else last_ts
+            if following is None and end <= current["ts"]:
+                open_visits[key] += 1
+                continue
+            dwell[key].append(min(max_dwell, end - current["ts"]))
+    return dwell, open_visits
+
+
+def time_per_question_report(events: list[dict[str, Any]], max_dwell: float = 1800.0) -> list[dict[str, Any]]:
+    counts: dict[tuple[str | None, str], int] = defaultdict(int)
+    for e in events:
+        if e["event"] in {"compute", "complete", "jump"}:
+            counts[(e["qid"], e["event"])] += 1
+
+    dwell, open_visits = dwell_times(events, max_dwell)
+    rows = []
+    for section, qid in dwell.keys() | open_visits.keys():
+        visits = dwell.get((section, qid), [])
+        rows.append(
+            {
+                "section": section,
+                "qid": qid,
+                "visits": len(visits),
+                "open": open_visits.get((section, qid), 0),
+                "median_s": statistics.median(visits) if visits else None,
+                "mean_s": statistics.fmean(visits) if visits else None,
+                "total_s": sum(visits),
+                "computes": counts[(qid, "compute")] if qid else 0,
+                "completes": counts[(qid, "complete")] if qid else 0,
+                "jumps": counts[(qid, "jump")] if qid else 0,
+            }
+        )
+    rows.sort(key=lambda r: (r["total_s"], r["open"]), reverse=True)
+    return rows
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Time-per-question report from a telemetry log.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--max-dwell", type=float, default=1800.0, help="cap in seconds for a single step visit")
+    args = parser.parse_args(argv)
+
+    rows = time_per_question_report(read_events(args.path), args.max_dwell)
+    print(
+        f"{'section':<12} {'question':<14} {'visits':>6} {'open':>5} {'median s':>9} {'mean s':>8} "
+        f"{'total min':>9} {'compute':>7} {'done':>5} {'jumps':>5}"
+    )
+    for r in rows:
+        median = f"{r['median_s']:.0f}" if r["median_s"] is not None else "—"
+        mean = f"{r['mean_s']:.0f}" if r["mean_s"] is not None else "—"
+        print(
+            f"{r['section'] or '':<12} {r['qid'] or '—':<14} {r['visits']:>6} {r['open']:>5} {median:>9} "
+            f"{mean:>8} {r['total_s'] / 60:>9.1f} {r['computes']:>7} {r['completes']:>5} {r['jumps']:>5}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())